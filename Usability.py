@@ -1,9 +1,15 @@
 import streamlit as st
 import pandas as pd
+import csv
 import time
+from datetime import datetime
 import os
-import matplotlib.pyplot as plt
+import io
+from types import MappingProxyType
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv as pa_csv
 
 # Create a folder called data in the main project folder
 DATA_FOLDER = "data"
@@ -16,20 +22,166 @@ DEMOGRAPHIC_CSV = os.path.join(DATA_FOLDER, "demographic_data.csv")
 TASK_CSV = os.path.join(DATA_FOLDER, "task_data.csv")
 EXIT_CSV = os.path.join(DATA_FOLDER, "exit_data.csv")
 
-
-def save_to_csv(data_dict, csv_file):
-    df_new = pd.DataFrame([data_dict])
-    if not os.path.isfile(csv_file):
-        df_new.to_csv(csv_file, mode='w', header=True, index=False)
-    else:
-        df_new.to_csv(csv_file, mode='a', header=False, index=False)
+# The tasks never change, so they are built once instead of on every rerun
+TASK_DESCRIPTIONS = MappingProxyType({
+    "Authorize App": "Log into Spotify and authorize the app to access your account.",
+    "View & Filter Results": "Navigate through your top songs or artists and apply filters to specify results.",
+    "Export Data": "Export your listening data by downloading a CSV file."
+})
+TASK_NAMES = tuple(TASK_DESCRIPTIONS)
 
 
-def load_from_csv(csv_file):
-    if os.path.isfile(csv_file):
-        return pd.read_csv(csv_file)
-    else:
-        return pd.DataFrame()
+def save_to_csv(data_dict, csv_file):
+    with open(csv_file, 'a', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(data_dict), lineterminator=os.linesep)
+        # Only a brand new (empty) file gets the header row
+        if f.tell() == 0:
+            writer.writeheader()
+        writer.writerow(data_dict)
+
+
+# The modification time is part of the cache key so a new save invalidates the cached copy.
+# pyarrow parses the file multi-threaded straight into a typed Arrow table, which
+# st.dataframe displays as is without a pandas round trip
+@st.cache_data(show_spinner=False, max_entries=8)
+def read_csv_cached(csv_file, mtime):
+    # Notes and feedback come from text areas and are saved as quoted multi-line
+    # fields; without this pyarrow may split a block inside one once the file grows
+    parse_options = pa_csv.ParseOptions(newlines_in_values=True)
+    return pa_csv.read_csv(csv_file, parse_options=parse_options)
+
+
+def csv_mtime(csv_file):
+    # A single stat both checks the file exists and gives the cache key
+    try:
+        return os.path.getmtime(csv_file)
+    except FileNotFoundError:
+        return None
+
+
+def load_from_csv(csv_file, mtime):
+    if mtime is None:
+        return pa.table({})
+    return read_csv_cached(csv_file, mtime)
+
+
+# Counting each (first, second) cell once with a bincount over integer codes and then
+# summing the small grid along each axis gives both per-key means from a single pass
+# over the data, like GROUPING SETS in SQL. It takes about as long as two groupby()
+# calls, and the result is cached per file version anyway
+def mean_by_each(first, second, values):
+    first_codes, first_keys = pd.factorize(first, sort=True)
+    second_codes, second_keys = pd.factorize(second, sort=True)
+    # Shifted by one so rows with a missing key land in bucket 0 instead of being dropped
+    shape = (len(first_keys) + 1, len(second_keys) + 1)
+    cells = np.ravel_multi_index((first_codes + 1, second_codes + 1), shape)
+    valid = ~np.isnan(values)
+    sums = np.bincount(cells[valid], weights=values[valid], minlength=shape[0] * shape[1]).reshape(shape)
+    counts = np.bincount(cells[valid], minlength=shape[0] * shape[1]).reshape(shape)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        first_means = sums.sum(axis=1)[1:] / counts.sum(axis=1)[1:]
+        second_means = sums.sum(axis=0)[1:] / counts.sum(axis=0)[1:]
+    return pd.Series(first_means, index=first_keys), pd.Series(second_means, index=second_keys)
+
+
+# The aggregates share the loader's (path, mtime) key rather than hashing the table
+@st.cache_data(show_spinner=False, max_entries=8)
+def compute_task_aggregates(csv_file, mtime):
+    task_table = read_csv_cached(csv_file, mtime)
+    durations = task_table['duration_seconds'].cast(pa.float64()).to_numpy()
+    avg_duration, avg_duration_by_task = mean_by_each(task_table['success'].to_numpy(),
+                                                      task_table['task_name'].to_numpy(), durations)
+    avg_duration = avg_duration.reindex(['Yes', 'Partial', 'No'])
+    return avg_duration, avg_duration_by_task, durations[~np.isnan(durations)]
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def compute_exit_aggregates(csv_file, mtime):
+    exit_table = read_csv_cached(csv_file, mtime)
+    avg_satisfaction = pc.mean(exit_table["satisfaction"]).as_py()
+    avg_difficulty = pc.mean(exit_table["difficulty"]).as_py()
+    return avg_satisfaction, avg_difficulty
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def compute_fit(difficulty, satisfaction):
+    # Closed-form least squares for a straight line, no need for polyfit's SVD
+    x = np.asarray(difficulty, dtype=float)
+    y = np.asarray(satisfaction, dtype=float)
+    mx = x.mean()
+    my = y.mean()
+    m = ((x - mx) * (y - my)).sum() / ((x - mx) ** 2).sum()
+    b = my - m * mx
+    return m, b
+
+
+# Quartiles, whiskers and fliers are computed (and sorted for) once per dataset,
+# the boxplot then only has to draw them. The raw bytes make a cheap cache key
+@st.cache_data(show_spinner=False, max_entries=8)
+def compute_box_stats(durations_bytes):
+    from matplotlib.cbook import boxplot_stats
+
+    return boxplot_stats(np.frombuffer(durations_bytes, dtype=float))
+
+
+def figure_to_png(fig):
+    # Same savefig settings st.pyplot uses
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', bbox_inches='tight', dpi=200)
+    return buf.getvalue()
+
+
+# Charts are drawn outside of pyplot and cached as rendered PNG bytes keyed on their
+# input arrays, so reruns that don't change the data skip both plotting and savefig,
+# and sessions share nothing mutable.
+# matplotlib is only imported once a chart actually has to be drawn. st.tabs runs the
+# report on every rerun, so this only saves the import while there is no data to plot
+@st.cache_data(show_spinner=False, max_entries=8)
+def render_boxplot(durations):
+    from matplotlib.figure import Figure
+
+    fig = Figure()
+    ax = fig.subplots()
+    ax.bxp(compute_box_stats(durations.tobytes()), orientation='horizontal')
+    ax.set_title('Task Completion Times')
+    ax.set_xlabel('Time (seconds)')
+    return figure_to_png(fig)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def render_bar_chart(averages, color, title, xlabel):
+    from matplotlib.figure import Figure
+
+    fig = Figure()
+    ax = fig.subplots()
+    positions = np.arange(len(averages))
+    ax.bar(positions, averages.to_numpy(), color=color)
+    ax.set_xticks(positions, averages.index.to_numpy(), rotation=90)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel('Average Time (seconds)')
+    return figure_to_png(fig)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def render_scatter(difficulty, satisfaction, avg_difficulty, avg_satisfaction):
+    from matplotlib.figure import Figure
+
+    fig = Figure()
+    ax = fig.subplots()
+    ax.scatter(difficulty, satisfaction)
+
+    # A line needs at least two distinct difficulty values to be fitted
+    if np.unique(difficulty).size > 1:
+        m, b = compute_fit(difficulty, satisfaction)
+        ax.plot(difficulty, m*difficulty+b, color='green', linestyle='--', label='Best Fit')
+    ax.scatter(avg_difficulty, avg_satisfaction, color='red', label='Average Point')
+
+    ax.set_title('Satisfaction vs Difficulty')
+    ax.set_xlabel('Difficulty')
+    ax.set_ylabel('Satisfaction')
+    ax.legend()
+    return figure_to_png(fig)
 
 
 def main():
@@ -70,7 +222,7 @@ def main():
                 st.warning("You must agree to the consent terms before proceeding.")
             else:
                 data_dict = {
-                    "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "timestamp": datetime.now().isoformat(' ', 'seconds'),
                     "consent_given": consent_given
                 }
                 save_to_csv(data_dict, CONSENT_CSV)
@@ -89,7 +241,7 @@ def main():
             submitted = st.form_submit_button("Submit Demographics")
             if submitted:
                 data_dict = {
-                    "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "timestamp": datetime.now().isoformat(' ', 'seconds'),
                     "name": name,
                     "country": country,
                     "age": age,
@@ -104,14 +256,8 @@ def main():
 
         name2 = st.text_input("Enter your name before beginning the task:")
 
-        task_descriptions = {
-            "Authorize App": "Log into Spotify and authorize the app to access your account.",
-            "View & Filter Results": "Navigate through your top songs or artists and apply filters to specify results.",
-            "Export Data": "Export your listening data by downloading a CSV file."
-        }
-
-        selected_task = st.selectbox("Select Task", list(task_descriptions.keys()))
-        st.write(f"**Task Description:** {task_descriptions[selected_task]}")
+        selected_task = st.selectbox("Select Task", TASK_NAMES)
+        st.write(f"**Task Description:** {TASK_DESCRIPTIONS[selected_task]}")
 
         if st.button("Start Task Timer"):
             st.session_state["start_time"] = time.time()
@@ -131,7 +277,7 @@ def main():
             duration_val = st.session_state.get("task_duration", None)
 
             data_dict = {
-                "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "timestamp": datetime.now().isoformat(' ', 'seconds'),
                 "user": name2,
                 "task_name": selected_task,
                 "success": success,
@@ -157,7 +303,7 @@ def main():
             submitted_exit = st.form_submit_button("Submit Exit Questionnaire")
             if submitted_exit:
                 data_dict = {
-                    "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "timestamp": datetime.now().isoformat(' ', 'seconds'),
                     "satisfaction": satisfaction,
                     "difficulty": difficulty,
                     "open_feedback": open_feedback
@@ -169,78 +315,62 @@ def main():
         st.header("Usability Report - Aggregated Results")
 
         with st.expander("**Consent Data**"):
-            consent_df = load_from_csv(CONSENT_CSV)
-            if not consent_df.empty:
-                st.dataframe(consent_df)
+            consent_table = load_from_csv(CONSENT_CSV, csv_mtime(CONSENT_CSV))
+            if consent_table.num_rows:
+                st.dataframe(consent_table)
             else:
                 st.info("No consent data available yet.")
 
         with st.expander("**Demographic Data**"):
-            demographic_df = load_from_csv(DEMOGRAPHIC_CSV)
-            if not demographic_df.empty:
-                st.dataframe(demographic_df)
+            demographic_table = load_from_csv(DEMOGRAPHIC_CSV, csv_mtime(DEMOGRAPHIC_CSV))
+            if demographic_table.num_rows:
+                st.dataframe(demographic_table)
             else:
                 st.info("No demographic data available yet.")
 
         with st.expander("**Task Performance Data**"):
-            task_df = load_from_csv(TASK_CSV)
-            if not task_df.empty:
-                st.dataframe(task_df)
-
-                avg_duration = task_df.groupby('success')['duration_seconds'].mean()
-                avg_duration_by_task = task_df.groupby('task_name')['duration_seconds'].mean()
-                avg_duration = avg_duration.reindex(['Yes', 'Partial', 'No'])
-
-                fig, ax = plt.subplots()
-                ax.boxplot(task_df['duration_seconds'].dropna(), vert=False)
-                ax.set_title('Task Completion Times')
-                ax.set_xlabel('Time (seconds)')
-                st.pyplot(fig)
-
-                fig2, ax2 = plt.subplots()
-                avg_duration_by_task.plot(kind='bar', ax=ax2, color='skyblue')
-                ax2.set_title('Average Task Completion Time by Task')
-                ax2.set_xlabel('Task Name')
-                ax2.set_ylabel('Average Time (seconds)')
-                st.pyplot(fig2)
-
-                for task, duration in avg_duration_by_task.items():
-                    st.write(f"**Average Time for {task}**: {duration:.2f} seconds")
-
-                fig3, ax3 = plt.subplots()
-                avg_duration.plot(kind='bar', ax=ax3, color=['green', 'orange', 'red'])
-                ax3.set_title('Average Task Completion Time by Status')
-                ax3.set_xlabel('Completion Status')
-                ax3.set_ylabel('Average Time (seconds)')
-                st.pyplot(fig3)
-
-                for status, duration in avg_duration.items():
-                    st.write(f"**Average Time for {status}**: {duration:.2f} seconds")
-            else:
-                st.info("No task data available yet.")
+            task_mtime = csv_mtime(TASK_CSV)
+            task_table = load_from_csv(TASK_CSV, task_mtime)
+            if task_table.num_rows:
+                st.dataframe(task_table)
 
-        with st.expander("**Exit Questionnaire Data**"):
-            exit_df = load_from_csv(EXIT_CSV)
-            if not exit_df.empty:
-                st.dataframe(exit_df)
+                avg_duration, avg_duration_by_task, durations = compute_task_aggregates(TASK_CSV, task_mtime)
 
-                avg_satisfaction = exit_df["satisfaction"].mean()
-                avg_difficulty = exit_df["difficulty"].mean()
+                if durations.size:
+                    st.image(render_boxplot(durations), width='stretch')
 
-                fig, ax = plt.subplots()
-                ax.scatter(exit_df["difficulty"], exit_df["satisfaction"])
+                    st.image(render_bar_chart(avg_duration_by_task, 'skyblue',
+                                              'Average Task Completion Time by Task', 'Task Name'),
+                             width='stretch')
 
-                m, b = np.polyfit(exit_df["difficulty"], exit_df["satisfaction"], 1)
-                ax.plot(exit_df["difficulty"], m*exit_df["difficulty"]+b,
-                        color='green', linestyle='--', label='Best Fit')
-                ax.scatter(avg_difficulty, avg_satisfaction, color='red', label='Average Point')
+                    st.table(avg_duration_by_task.rename_axis('Task Name')
+                             .rename('Average Time (seconds)').to_frame()
+                             .style.format("{:.2f}"))
+
+                    st.image(render_bar_chart(avg_duration, ['green', 'orange', 'red'],
+                                              'Average Task Completion Time by Status', 'Completion Status'),
+                             width='stretch')
+
+                    st.table(avg_duration.rename_axis('Completion Status')
+                             .rename('Average Time (seconds)').to_frame()
+                             .style.format("{:.2f}"))
+                else:
+                    st.info("No task durations recorded yet.")
+            else:
+                st.info("No task data available yet.")
+
+        with st.expander("**Exit Questionnaire Data**"):
+            exit_mtime = csv_mtime(EXIT_CSV)
+            exit_table = load_from_csv(EXIT_CSV, exit_mtime)
+            if exit_table.num_rows:
+                st.dataframe(exit_table)
 
-                ax.set_title('Satisfaction vs Difficulty')
-                ax.set_xlabel('Difficulty')
-                ax.set_ylabel('Satisfaction')
-                ax.legend()
+                avg_satisfaction, avg_difficulty = compute_exit_aggregates(EXIT_CSV, exit_mtime)
 
-                st.pyplot(fig)
+                st.image(render_scatter(exit_table["difficulty"].to_numpy(),
+                                        exit_table["satisfaction"].to_numpy(),
+                                        avg_difficulty, avg_satisfaction),
+                         width='stretch')
 
                 st.write(f"**Average Satisfaction**: {avg_satisfaction:.2f}")
                 st.write(f"**Average Difficulty**: {avg_difficulty:.2f}")